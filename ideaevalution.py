@@ -1,14 +1,166 @@
+import asyncio
+import functools
+import hashlib
 import logging
+import multiprocessing
+import os
 import re
-from typing import List, Dict, Any
+import string
+import zipfile
+import ahocorasick
+from array import array
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from io import BytesIO
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional
 from fastapi import FastAPI, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from io import BytesIO
-from docx import Document
+from lxml import etree
+
+def _new_pool() -> ProcessPoolExecutor:
+    # Workers are spawned rather than forked: the server is already multi-threaded
+    # when the pool starts, and a forked child can deadlock on locks held at fork time
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
 
-app = FastAPI(title="Business Document Analyzer")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Extraction and analysis are CPU-bound, so run them in worker processes
+    app.state.pool = _new_pool()
+    try:
+        yield
+    finally:
+        app.state.pool.shutdown()
+
+# ANALYZER_DEBUG=1 turns on debug mode, which also validates every response body
+app = FastAPI(
+    title="Business Document Analyzer",
+    lifespan=lifespan,
+    debug=os.environ.get("ANALYZER_DEBUG") == "1"
+)
 logging.basicConfig(level=logging.INFO)
 
+# Words that introduce a competitor name; "similar to" is matched as a word pair
+_COMPETITOR_CUES = frozenset({"like", "competitor", "competitors", "alternative", "alternatives"})
+
+_SENT_RE = re.compile(r'[.!?]')
+
+_W_NS = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+# Uploaded XML is untrusted: never expand entities or fetch anything over the network
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+_BODY_PARAGRAPHS = etree.XPath("/w:document/w:body/w:p", namespaces=_W_NS)
+# Run content of a paragraph, in document order, the way python-docx reads Paragraph.text
+_RUN_CONTENT = etree.XPath("./w:r/* | ./w:hyperlink/w:r/*", namespaces=_W_NS)
+_W_T = "{%s}t" % _W_NS["w"]
+_W_BR = "{%s}br" % _W_NS["w"]
+_W_BR_TYPE = "{%s}type" % _W_NS["w"]
+_RUN_CONTENT_TEXT = {
+    "{%s}tab" % _W_NS["w"]: "\t",
+    "{%s}ptab" % _W_NS["w"]: "\t",
+    "{%s}cr" % _W_NS["w"]: "\n",
+    "{%s}noBreakHyphen" % _W_NS["w"]: "-"
+}
+
+_SCALABILITY_KEYWORDS = {
+    "architecture": ["microservices", "kubernetes", "serverless"],
+    "growth": ["expand", "global", "scale"],
+    "automation": ["CI/CD", "terraform", "ansible"],
+    "limitations": ["bottleneck", "constraint", "limit"]
+}
+
+# Substrings whose mere presence gates feasibility issues and recommendations
+_PRESENCE_FLAGS = (
+    "financial", "market", "research", "analysis", "scale",
+    "test", "load", "competitor", "compare", "differentiat"
+)
+
+# Market and financial signals as literals; "\d" is expanded per digit, and
+# differentiator words only count when followed by whitespace (checked in the scan)
+_SIGNAL_WORDS = {
+    "usage": ["used by", "deployed at", "implemented with", "customers include"],
+    "diff": ["unique", "different", "only", "exclusive"],
+    "case": ["case study", "success story", "testimonial"],
+    "money": ["$" + digit for digit in string.digits]
+}
+
+# Single-pass matcher over text_lower; each word maps to (category hits, flag, signal),
+# where category hits are (category index, multiplicity) pairs so a keyword listed
+# in several categories, or repeated in one, counts everywhere it is listed.
+# Built once per distinct keyword set, so tuned keywords do not rebuild it per request.
+@functools.lru_cache(maxsize=16)
+def _build_matcher(scalability_keywords: tuple[tuple[str, tuple[str, ...]], ...]) -> ahocorasick.Automaton:
+    words = {}
+    for category_id, (_, keywords) in enumerate(scalability_keywords):
+        for keyword in keywords:
+            category_hits = words.setdefault(keyword.lower(), [{}, None, None])[0]
+            category_hits[category_id] = category_hits.get(category_id, 0) + 1
+    for flag in _PRESENCE_FLAGS:
+        words.setdefault(flag, [{}, None, None])[1] = flag
+    for signal, signal_words in _SIGNAL_WORDS.items():
+        for word in signal_words:
+            words.setdefault(word, [{}, None, None])[2] = signal
+
+    matcher = ahocorasick.Automaton()
+    for word, (category_hits, flag, signal) in words.items():
+        matcher.add_word(word, (tuple(category_hits.items()), flag, signal))
+    matcher.make_automaton()
+    return matcher
+
+# Shared read-only results for documents that could not be read or analysed
+_EMPTY_ANALYSIS = MappingProxyType({
+    "summary": "No content available for analysis",
+    "key_findings": ("Document could not be processed",),
+    "scalability": MappingProxyType({
+        "score": 0,
+        "rating": "Not assessed",
+        "details": MappingProxyType({
+            "architecture": 0,
+            "growth": 0,
+            "automation": 0,
+            "limitations": 0
+        })
+    }),
+    "market": MappingProxyType({
+        "existing_usage": False,
+        "competitors": (),
+        "differentiators": 0,
+        "case_studies": False
+    }),
+    "feasibility": ("Analysis unavailable",),
+    "recommendations": ("Upload a valid DOCX file",)
+})
+
+# Nested mappings are copied into the response body, since proxies cannot be serialised
+_FAILED_RESPONSE_FIELDS = MappingProxyType({
+    "key_findings": ("Complete analysis failure",),
+    "scalability_analysis": MappingProxyType({
+        "score": 0,
+        "rating": "Not assessed",
+        "architecture_score": 0,
+        "growth_potential": 0,
+        "automation_level": 0,
+        "identified_limitations": 0
+    }),
+    "market_validation": MappingProxyType({
+        "existing_usage": False,
+        "competitors": (),
+        "differentiators": 0,
+        "case_studies": False
+    }),
+    "feasibility_issues": ("System error occurred",),
+    "recommendations": ("Contact support",),
+    "viability_score": 0,
+    "viability_status": "Not assessed"
+})
+
+# Responses keyed on (accepted as .docx, SHA-256 of the upload), least recently used first
+_RESP_CACHE: OrderedDict[tuple[bool, bytes], dict] = OrderedDict()
+_RESP_CACHE_SIZE = 128
+
 class AnalysisResponse(BaseModel):
     filename: str
     summary: str = "No summary available"
@@ -32,12 +184,27 @@ class AnalysisResponse(BaseModel):
     viability_score: int = 0
     viability_status: str = "Not assessed"
 
-def safe_extract_text(file: UploadFile) -> str:
+def _run_content_text(el) -> str:
+    if el.tag == _W_T:
+        return el.text or ""
+    if el.tag == _W_BR:
+        # Only line breaks become text; page and column breaks are dropped
+        return "\n" if el.get(_W_BR_TYPE, "textWrapping") == "textWrapping" else ""
+    return _RUN_CONTENT_TEXT.get(el.tag, "")
+
+def safe_extract_text(filename: str, data: bytes) -> str:
     try:
-        if not file.filename.lower().endswith('.docx'):
+        if not filename.lower().endswith('.docx'):
             raise ValueError("Only .docx files are supported")
-        doc = Document(BytesIO(file.file.read()))
-        paragraphs = [para.text.strip() for para in doc.paragraphs if para.text.strip()]
+        # Read run content straight from document.xml; the python-docx object model is not needed
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            with archive.open("word/document.xml") as document_xml:
+                tree = etree.parse(document_xml, _XML_PARSER)
+        paragraphs = []
+        for para in _BODY_PARAGRAPHS(tree):
+            para_text = "".join(_run_content_text(el) for el in _RUN_CONTENT(para)).strip()
+            if para_text:
+                paragraphs.append(para_text)
         return "\n".join(paragraphs) if paragraphs else "Document appears to be empty"
     except Exception as e:
         logging.error(f"Text extraction error: {str(e)}")
@@ -47,68 +214,69 @@ def robust_summary(text: str) -> str:
     try:
         if not text or text.startswith("Text extraction failed"):
             return "No content available for summary"
-        sentences = [s.strip() for s in re.split(r'[.!?]', text) if s.strip()]
-        return ". ".join(sentences[:3]) + ("." if sentences else "")
+        # Stop at the third sentence instead of splitting the whole document
+        sentences = []
+        start = 0
+        for m in _SENT_RE.finditer(text):
+            sentence = text[start:m.start()].strip()
+            if sentence:
+                sentences.append(sentence)
+                if len(sentences) == 3:
+                    break
+            start = m.end()
+        else:
+            tail = text[start:].strip()
+            if tail:
+                sentences.append(tail)
+        return ". ".join(sentences) + ("." if sentences else "")
     except Exception:
         return "Summary generation failed"
 
-def compute_viability_score(analysis: dict) -> tuple[int, str]:
-    score = 0
-    score += analysis["scalability"]["score"] * 10
-    score += analysis["market"]["differentiators"] * 5
-    if analysis["market"]["existing_usage"]:
-        score += 10
-    if not analysis["feasibility"] or "No major feasibility issues detected" in analysis["feasibility"]:
-        score += 10
-
-    status = (
-        "Strong" if score >= 80 else
-        "Promising" if score >= 60 else
-        "Needs Improvement"
+_VIABILITY_TIERS = ("Needs Improvement", "Promising", "Strong")
+
+def compute_viability_score(analysis: Mapping[str, Any]) -> tuple[int, str]:
+    market = analysis["market"]
+    feasibility = analysis["feasibility"]
+    score = (
+        analysis["scalability"]["score"] * 10
+        + market["differentiators"] * 5
+        + (10 if market["existing_usage"] else 0)
+        + (10 if not feasibility or "No major feasibility issues detected" in feasibility else 0)
     )
-    return score, status
+    return score, _VIABILITY_TIERS[(score >= 60) + (score >= 80)]
 
-def analyze_content(text: str) -> dict:
+# May return the shared read-only _EMPTY_ANALYSIS; _pipeline copies the result into
+# plain dicts before it crosses the process boundary
+def analyze_content(text: str, scalability_keywords: Optional[Dict[str, List[str]]] = None) -> Mapping[str, Any]:
     if not text or text.startswith("Text extraction failed"):
-        return {
-            "summary": "No content available for analysis",
-            "key_findings": ["Document could not be processed"],
-            "scalability": {
-                "score": 0,
-                "rating": "Not assessed",
-                "details": {
-                    "architecture": 0,
-                    "growth": 0,
-                    "automation": 0,
-                    "limitations": 0
-                }
-            },
-            "market": {
-                "existing_usage": False,
-                "competitors": [],
-                "differentiators": 0,
-                "case_studies": False
-            },
-            "feasibility": ["Analysis unavailable"],
-            "recommendations": ["Upload a valid DOCX file"]
-        }
+        return _EMPTY_ANALYSIS
 
+    # One C-level pass over the joined text; lowering per paragraph during
+    # extraction would need a second join and keep both copies alive anyway
     text_lower = text.lower()
 
     # Scalability
-    scalability_keywords = {
-        "architecture": ["microservices", "kubernetes", "serverless"],
-        "growth": ["expand", "global", "scale"],
-        "automation": ["CI/CD", "terraform", "ansible"],
-        "limitations": ["bottleneck", "constraint", "limit"]
-    }
+    # The character scan runs inside pyahocorasick's C automaton; Python only
+    # handles the (end index, payload) pairs it yields for keyword, flag and signal hits
+    if scalability_keywords is None:
+        scalability_keywords = _SCALABILITY_KEYWORDS
+    matcher = _build_matcher(tuple(
+        (category, tuple(keywords)) for category, keywords in scalability_keywords.items()
+    ))
 
-    scalability_scores = {
-        category: sum(text_lower.count(keyword) for keyword in keywords)
-        for category, keywords in scalability_keywords.items()
-    }
+    category_counts = array("i", [0] * len(scalability_keywords))
+    present_flags = set()
+    signal_counts = defaultdict(int)
+    for end, (category_hits, flag, signal) in matcher.iter(text_lower):
+        for category_id, multiplicity in category_hits:
+            category_counts[category_id] += multiplicity
+        if flag:
+            present_flags.add(flag)
+        if signal and (signal != "diff" or text_lower[end + 1:end + 2].isspace()):
+            signal_counts[signal] += 1
 
-    total_scalability = sum(scalability_scores.values())
+    scalability_scores = dict(zip(scalability_keywords, category_counts))
+    total_scalability = sum(category_counts)
     scalability_rating = (
         "High" if total_scalability > 5 else
         "Medium" if total_scalability > 2 else
@@ -116,43 +284,40 @@ def analyze_content(text: str) -> dict:
     )
 
     # Market validation
-    competitors = list(set(
-        m.group(1) for m in re.finditer(
-            r"(?:similar to|like|competitors?|alternatives?)\s([A-Z]\w+)",
-            text, re.IGNORECASE
-        )
-    ))
+    # A competitor is a capitalised word of at least two word characters
+    # directly following a cue word
+    tokens = text.split()
+    competitors = []
+    for i in range(1, len(tokens)):
+        name = tokens[i].rstrip(string.punctuation)
+        if not (name[:1].isupper() and len(name) > 1 and name[1].isalnum()):
+            continue
+        cue = tokens[i - 1].lower()
+        if cue in _COMPETITOR_CUES or (cue == "to" and i > 1 and tokens[i - 2].lower() == "similar"):
+            competitors.append(name)
+    competitors = list(dict.fromkeys(competitors))
 
     market_validation = {
-        "existing_usage": bool(re.search(
-            r"(used by|deployed at|implemented with|customers include)",
-            text_lower
-        )),
+        "existing_usage": signal_counts["usage"] > 0,
         "competitors": competitors[:3],
-        "differentiators": len(re.findall(
-            r"(unique|different|only|exclusive)\s",
-            text_lower
-        )),
-        "case_studies": bool(re.search(
-            r"(case study|success story|testimonial)",
-            text_lower
-        ))
+        "differentiators": signal_counts["diff"],
+        "case_studies": signal_counts["case"] > 0
     }
 
     # Feasibility
     feasibility_issues = []
-    if 'financial' in text_lower and not re.search(r'\$\d+', text):
+    if 'financial' in present_flags and not signal_counts["money"]:
         feasibility_issues.append("Missing specific financial numbers")
-    if 'market' in text_lower and not ('research' in text_lower or 'analysis' in text_lower):
+    if 'market' in present_flags and not ('research' in present_flags or 'analysis' in present_flags):
         feasibility_issues.append("Missing market research/analysis")
     if not feasibility_issues:
         feasibility_issues.append("No major feasibility issues detected")
 
     # Recommendations
     recommendations = []
-    if 'scale' in text_lower and not ('test' in text_lower or 'load' in text_lower):
+    if 'scale' in present_flags and not ('test' in present_flags or 'load' in present_flags):
         recommendations.append("Add load testing documentation")
-    if 'competitor' in text_lower and not ('compare' in text_lower or 'differentiat' in text_lower):
+    if 'competitor' in present_flags and not ('compare' in present_flags or 'differentiat' in present_flags):
         recommendations.append("Include competitor comparison")
     if not recommendations:
         recommendations.append("Document appears comprehensive")
@@ -174,45 +339,87 @@ def analyze_content(text: str) -> dict:
         "recommendations": recommendations
     }
 
-@app.post("/analyze", response_model=AnalysisResponse)
+def _pipeline(filename: str, raw: bytes) -> dict:
+    text = safe_extract_text(filename, raw)
+    analysis = analyze_content(text)
+    viability_score, viability_status = compute_viability_score(analysis)
+
+    return dict(
+        summary=analysis["summary"],
+        key_findings=analysis["key_findings"],
+        scalability_analysis={
+            "score": analysis["scalability"]["score"],
+            "rating": analysis["scalability"]["rating"],
+            "architecture_score": analysis["scalability"]["details"]["architecture"],
+            "growth_potential": analysis["scalability"]["details"]["growth"],
+            "automation_level": analysis["scalability"]["details"]["automation"],
+            "identified_limitations": analysis["scalability"]["details"]["limitations"]
+        },
+        market_validation={
+            "existing_usage": analysis["market"]["existing_usage"],
+            "competitors": analysis["market"]["competitors"],
+            "differentiators": analysis["market"]["differentiators"],
+            "case_studies": analysis["market"]["case_studies"]
+        },
+        feasibility_issues=analysis["feasibility"],
+        recommendations=analysis["recommendations"],
+        viability_score=viability_score,
+        viability_status=viability_status
+    )
+
+def _hash_upload(upload) -> bytes:
+    # Hash the spooled upload in chunks so cache hits never load it into memory
+    upload.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: upload.read(1 << 20), b""):
+        digest.update(chunk)
+    return digest.digest()
+
+def _read_upload(upload) -> bytes:
+    upload.seek(0)
+    return upload.read()
+
+async def _run_pipeline(filename: str, raw: bytes) -> dict:
+    pool = app.state.pool
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, _pipeline, filename, raw)
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory on a huge document.xml); replace the pool
+        # once so only the requests in flight on it fail
+        if app.state.pool is pool:
+            app.state.pool = _new_pool()
+            pool.shutdown(wait=False)
+        raise
+
+@app.post("/analyze", response_class=JSONResponse, responses={200: {"model": AnalysisResponse}})
 async def analyze_document(file: UploadFile = File(...)):
     try:
-        text = safe_extract_text(file)
-        analysis = analyze_content(text)
-        viability_score, viability_status = compute_viability_score(analysis)
-
-        return AnalysisResponse(
-            filename=file.filename,
-            summary=analysis["summary"],
-            key_findings=analysis["key_findings"],
-            scalability_analysis={
-                "score": analysis["scalability"]["score"],
-                "rating": analysis["scalability"]["rating"],
-                "architecture_score": analysis["scalability"]["details"]["architecture"],
-                "growth_potential": analysis["scalability"]["details"]["growth"],
-                "automation_level": analysis["scalability"]["details"]["automation"],
-                "identified_limitations": analysis["scalability"]["details"]["limitations"]
-            },
-            market_validation={
-                "existing_usage": analysis["market"]["existing_usage"],
-                "competitors": analysis["market"]["competitors"],
-                "differentiators": analysis["market"]["differentiators"],
-                "case_studies": analysis["market"]["case_studies"]
-            },
-            feasibility_issues=analysis["feasibility"],
-            recommendations=analysis["recommendations"],
-            viability_score=viability_score,
-            viability_status=viability_status
-        )
+        digest = await run_in_threadpool(_hash_upload, file.file)
+        cache_key = (file.filename.lower().endswith('.docx'), digest)
+        fields = _RESP_CACHE.get(cache_key)
+        if fields is not None:
+            _RESP_CACHE.move_to_end(cache_key)
+        else:
+            # Only a cache miss needs the bytes, which are pickled to the worker process
+            raw = await run_in_threadpool(_read_upload, file.file)
+            fields = await _run_pipeline(file.filename, raw)
+            if app.debug:
+                AnalysisResponse(filename=file.filename, **fields)
+            _RESP_CACHE[cache_key] = fields
+            if len(_RESP_CACHE) > _RESP_CACHE_SIZE:
+                _RESP_CACHE.popitem(last=False)
+
+        # Returning the response directly skips response_model validation and jsonable_encoder
+        return JSONResponse({"filename": file.filename, **fields})
     except Exception as e:
         logging.error(f"Analysis failed completely: {str(e)}", exc_info=True)
-        return AnalysisResponse(
-            filename=file.filename,
-            summary=f"Analysis failed: {str(e)}",
-            key_findings=["Complete analysis failure"],
-            feasibility_issues=["System error occurred"],
-            recommendations=["Contact support"]
-        )
+        return JSONResponse({
+            "filename": file.filename,
+            "summary": f"Analysis failed: {str(e)}",
+            **_FAILED_RESPONSE_FIELDS,
+            "scalability_analysis": dict(_FAILED_RESPONSE_FIELDS["scalability_analysis"]),
+            "market_validation": dict(_FAILED_RESPONSE_FIELDS["market_validation"])
+        })
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,118 @@
+import zipfile
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+import ideaevalution
+from ideaevalution import _RESP_CACHE, analyze_content, app, safe_extract_text
+
+_DOCUMENT_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+            xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"
+            xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape"
+            xmlns:v="urn:schemas-microsoft-com:vml">
+  <w:body>
+    <w:p>
+      <w:r><w:t>Competitors like</w:t><w:br/><w:t>Acme exist.</w:t></w:r>
+    </w:p>
+    <w:p>
+      <w:r><w:t>We are exclusive</w:t><w:tab/><w:t>to partners.</w:t></w:r>
+      <w:r>
+        <mc:AlternateContent>
+          <mc:Choice Requires="wps">
+            <w:drawing><wps:txbx><w:txbxContent>
+              <w:p><w:r><w:t>Text box</w:t></w:r></w:p>
+            </w:txbxContent></wps:txbx></w:drawing>
+          </mc:Choice>
+          <mc:Fallback>
+            <w:pict><v:textbox><w:txbxContent>
+              <w:p><w:r><w:t>Text box</w:t></w:r></w:p>
+            </w:txbxContent></v:textbox></w:pict>
+          </mc:Fallback>
+        </mc:AlternateContent>
+      </w:r>
+    </w:p>
+  </w:body>
+</w:document>
+"""
+
+
+def _docx(document_xml: str) -> bytes:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", document_xml)
+    return buffer.getvalue()
+
+
+def test_extract_keeps_tabs_and_breaks_and_skips_text_boxes():
+    text = safe_extract_text("plan.docx", _docx(_DOCUMENT_XML))
+    assert text == "Competitors like\nAcme exist.\nWe are exclusive\tto partners."
+
+
+def test_extracted_breaks_separate_words_for_analysis():
+    analysis = analyze_content(safe_extract_text("plan.docx", _docx(_DOCUMENT_XML)))
+    assert analysis["market"]["competitors"] == ["Acme"]
+    assert analysis["market"]["differentiators"] == 1
+
+
+def test_competitors_need_at_least_two_characters():
+    analysis = analyze_content("Like I said, it works like A.B. and like Zoom.")
+    assert analysis["market"]["competitors"] == ["Zoom"]
+
+
+def test_differentiators_accept_any_whitespace():
+    analysis = analyze_content("Only\xa0us. unique\vthing, exclusive deal, different.")
+    assert analysis["market"]["differentiators"] == 3
+
+
+def test_keywords_count_in_every_category_they_are_listed_in():
+    analysis = analyze_content("We scale.", {"a": ["scale", "Scale"], "b": ["scale"]})
+    assert analysis["scalability"]["details"] == {"a": 2, "b": 1}
+
+
+def test_extract_does_not_resolve_external_entities(tmp_path):
+    secret = tmp_path / "secret.txt"
+    secret.write_text("TOPSECRET")
+    document_xml = (
+        '<?xml version="1.0"?>'
+        f'<!DOCTYPE w:document [<!ENTITY x SYSTEM "{secret.as_uri()}">]>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        "<w:body><w:p><w:r><w:t>Leak: &x;</w:t></w:r></w:p></w:body></w:document>"
+    )
+    assert "TOPSECRET" not in safe_extract_text("plan.docx", _docx(document_xml))
+
+
+def test_endpoint_caches_by_content_and_docx_acceptance():
+    raw = _docx(_DOCUMENT_XML)
+    _RESP_CACHE.clear()
+    with TestClient(app) as client:
+        first = client.post("/analyze", files={"file": ("plan.docx", raw)}).json()
+        assert first["market_validation"]["competitors"] == ["Acme"]
+        assert len(_RESP_CACHE) == 1
+
+        for name in ("copy.DOCX", ".docx"):
+            renamed = client.post("/analyze", files={"file": (name, raw)}).json()
+            assert renamed == {**first, "filename": name}
+        assert len(_RESP_CACHE) == 1
+
+        for name in ("notes", "plan.txt"):
+            rejected = client.post("/analyze", files={"file": (name, raw)}).json()
+            assert rejected["summary"] == "No content available for analysis"
+        assert len(_RESP_CACHE) == 2
+
+
+def test_endpoint_reads_upload_bytes_only_on_cache_miss(monkeypatch):
+    reads = []
+    read_upload = ideaevalution._read_upload
+
+    def counting_read_upload(upload):
+        reads.append(upload)
+        return read_upload(upload)
+
+    monkeypatch.setattr(ideaevalution, "_read_upload", counting_read_upload)
+    raw = _docx(_DOCUMENT_XML)
+    _RESP_CACHE.clear()
+    with TestClient(app) as client:
+        responses = [client.post("/analyze", files={"file": ("plan.docx", raw)}).json() for _ in range(3)]
+    assert len(reads) == 1
+    assert all(r["market_validation"]["competitors"] == ["Acme"] for r in responses)